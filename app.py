@@ -1,11 +1,10 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from plotly.colors import qualitative
 import numpy as np
-from collections import Counter
-import re
+import os
+from pathlib import Path
 
 # Konfigurasi halaman
 st.set_page_config(
@@ -15,199 +14,392 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS untuk styling dengan warna yang lebih menarik
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 3rem;
-        font-weight: bold;
-        text-align: center;
-        color: #2E86AB;
-        margin-bottom: 2rem;
-        text-shadow: 2px 2px 4px rgba(0,0,0,0.1);
-    }
-    
-    .metric-card {
-        background: linear-gradient(135deg, #ff6b6b 0%, #ee5a24 100%);
-        padding: 1.5rem;
-        border-radius: 15px;
-        color: white;
-        text-align: center;
-        box-shadow: 0 8px 25px rgba(255, 107, 107, 0.3);
-        margin-bottom: 1rem;
-        transition: transform 0.3s ease;
-    }
-    
-    .metric-card:hover {
-        transform: translateY(-5px);
-        box-shadow: 0 12px 35px rgba(255, 107, 107, 0.4);
-    }
-    
-    .hospital-card {
-        background: linear-gradient(135deg, #a8edea 0%, #fed6e3 100%);
-        padding: 1rem;
-        border-radius: 10px;
-        color: #2c3e50;
-        margin: 0.5rem 0;
-        text-align: center;
-        font-weight: bold;
-        box-shadow: 0 4px 15px rgba(168, 237, 234, 0.3);
-        transition: transform 0.3s ease;
-    }
-    
-    .hospital-card:hover {
-        transform: scale(1.02);
-        box-shadow: 0 6px 20px rgba(168, 237, 234, 0.4);
-    }
-    
-    .sidebar .sidebar-content {
-        background: linear-gradient(180deg, #667eea 0%, #764ba2 100%);
-    }
-    
-    .sentiment-positive {
-        color: #00b894;
-        font-weight: bold;
-        text-shadow: 1px 1px 2px rgba(0, 184, 148, 0.2);
-    }
-    
-    .sentiment-negative {
-        color: #e17055;
-        font-weight: bold;
-        text-shadow: 1px 1px 2px rgba(225, 112, 85, 0.2);
-    }
-    
-    .sentiment-neutral {
-        color: #fdcb6e;
-        font-weight: bold;
-        text-shadow: 1px 1px 2px rgba(253, 203, 110, 0.2);
-    }
-    
-    .insight-box {
-        background: linear-gradient(135deg, #ffecd2 0%, #fcb69f 100%);
-        padding: 1.5rem;
-        border-radius: 15px;
-        margin: 1rem 0;
-        box-shadow: 0 4px 15px rgba(252, 182, 159, 0.3);
-    }
-    
+# Custom CSS untuk styling dengan warna yang lebih menarik (styles.css)
+@st.cache_resource
+def load_css():
+    """Membaca stylesheet sekali per proses dengan whitespace dipadatkan"""
+    css = Path('styles.css').read_text(encoding='utf-8')
+    return f"<style>{' '.join(css.split())}</style>"
 
-</style>
-""", unsafe_allow_html=True)
+# CSS tetap dikirim setiap rerun karena elemen yang tidak dirender akan dihapus Streamlit
+st.markdown(load_css(), unsafe_allow_html=True)
+
+# Fungsi untuk membuat HTML kartu metrik
+def metric_card(background, title, value):
+    """Membuat HTML satu kartu metrik"""
+    return f"""
+    <div class="metric-card" style="background: {background};">
+        <h3>{title}</h3>
+        <h2>{value}</h2>
+    </div>"""
+
+# String bintang untuk rating 0-5
+STARS = ["⭐" * i for i in range(6)]
+
+# Warna tiap label sentimen
+SENTIMENT_COLORS = {
+    'positif': '#00b894',
+    'negatif': '#e17055'
+}
+
+# Kelas CSS dan emoji tiap label sentimen
+SENTIMENT_STYLES = {
+    'positif': ('sentiment-positive', '😊'),
+    'negatif': ('sentiment-negative', '😞')
+}
+
+# Layout bersama semua chart Plotly
+PLOTLY_LAYOUT = dict(
+    plot_bgcolor='rgba(0,0,0,0)',
+    paper_bgcolor='rgba(0,0,0,0)',
+    font=dict(color='#2c3e50')
+)
+
+# Palet warna cluster
+CLUSTER_COLORS = ['#ff6b6b', '#4ecdc4', '#45b7d1', '#96ceb4', '#ffeaa7', '#dda0dd', '#ff9ff3', '#54a0ff']
+
+# Kolom dataset yang dipakai dashboard
+DATA_COLUMNS = ['rating', 'review', 'location', 'cluster', 'predicted_sentiment']
 
 # Fungsi untuk load data
 @st.cache_data
 def load_data():
     try:
-        df = pd.read_csv('HasilSentimenAllRS.csv')
+        csv_path = Path('HasilSentimenAllRS.csv')
+        parquet_path = csv_path.with_suffix('.parquet')
+        df = None
+        # Pakai salinan Parquet jika masih lebih baru dari CSV
+        if parquet_path.exists() and parquet_path.stat().st_mtime >= csv_path.stat().st_mtime:
+            try:
+                df = pd.read_parquet(parquet_path, columns=DATA_COLUMNS)
+            except Exception:
+                # Salinan rusak atau tidak lengkap, dibuat ulang dari CSV
+                df = None
+        
+        if df is None:
+            # Hanya baca kolom yang dipakai dashboard, dengan tipe data eksplisit
+            df = pd.read_csv(
+                csv_path,
+                usecols=DATA_COLUMNS,
+                dtype={
+                    'rating': 'int8',
+                    'cluster': 'int8',
+                    'location': 'category',
+                    'predicted_sentiment': 'category'
+                },
+                engine='c'
+            )
+            # Tulis ke file sementara lalu ganti sekaligus, sehingga penulisan
+            # yang terputus tidak meninggalkan salinan Parquet setengah jadi
+            tmp_path = parquet_path.with_name(f'{parquet_path.name}.{os.getpid()}.tmp')
+            try:
+                df.to_parquet(tmp_path, compression='zstd')
+                os.replace(tmp_path, parquet_path)
+            except Exception:
+                # Salinan Parquet hanya optimasi (direktori read-only, pyarrow
+                # tidak terpasang, dll.), cukup pakai hasil baca CSV
+                pass
+            finally:
+                try:
+                    tmp_path.unlink(missing_ok=True)
+                except OSError:
+                    pass
+        
+        # Kategori dari read_csv selalu berupa string dan Parquet menyimpan
+        # kategori integer sebagai int biasa, jadi cluster dikonversi di sini
+        df['cluster'] = df['cluster'].astype('category')
         return df
     except Exception as e:
         st.error(f"Error loading data: {e}")
         return pd.DataFrame()
 
+# Fungsi untuk menghitung agregasi yang dipakai di setiap menu
+def grouped_count_sum(row_codes, col_codes, n_rows, n_cols, weights=None):
+    """Menghitung matriks jumlah (dan total bobot) per pasangan kode kategori"""
+    flat = row_codes.astype(np.int64) * n_cols + col_codes
+    counts = np.bincount(flat, minlength=n_rows * n_cols).reshape(n_rows, n_cols)
+    if weights is None:
+        return counts
+    sums = np.bincount(flat, weights=weights, minlength=n_rows * n_cols).reshape(n_rows, n_cols)
+    return counts, sums
+
+@st.cache_data
+def build_aggregates(df):
+    """Menghitung semua agregasi statis sekali per dataset"""
+    locations = df['location'].cat.categories
+    sentiments = df['predicted_sentiment'].cat.categories
+    
+    # Tabel RS x sentimen langsung dari kode kategori (bincount 2D)
+    sentiment_hospital = pd.DataFrame(
+        grouped_count_sum(
+            df['location'].cat.codes.to_numpy(),
+            df['predicted_sentiment'].cat.codes.to_numpy(),
+            len(locations),
+            len(sentiments)
+        ),
+        index=pd.Index(locations, name='location'),
+        columns=pd.Index(sentiments, name='predicted_sentiment')
+    )
+    
+    return {
+        # Daftar RS diambil dari kategori, tanpa memindai kolom
+        'hospitals': tuple(locations),
+        'hospital_stats': df.groupby('location', observed=True).agg({
+            'rating': 'mean',
+            'review': 'count'
+        }).round(2),
+        'rating_dist': df['rating'].value_counts().sort_index(),
+        'hospital_counts': df['location'].value_counts(),
+        'sentiment_counts': df['predicted_sentiment'].value_counts(),
+        'sentiment_hospital': sentiment_hospital,
+        # Posisi baris per sentimen (dan per rumah sakit) untuk contoh ulasan
+        'sentiment_idx': df.groupby('predicted_sentiment', observed=True, sort=False).indices,
+        'location_sentiment_idx': df.groupby(['location', 'predicted_sentiment'], observed=True, sort=False).indices,
+        # Posisi baris per RS dan per (RS, cluster) untuk filter halaman Clustering
+        'location_idx': df.groupby('location', observed=True, sort=False).indices,
+        'location_cluster_idx': df.groupby(['location', 'cluster'], observed=True, sort=False).indices,
+        # Label tampilan untuk setiap cluster
+        'cluster_names': {c: f'Cluster {c}' for c in df['cluster'].cat.categories},
+    }
+
+@st.cache_data
+def build_cluster_aggregates(df, hospitals):
+    """Menghitung agregasi halaman Clustering untuk RS yang dipilih"""
+    filtered = df[df['location'].isin(hospitals)]
+    locations = df['location'].cat.categories
+    clusters = df['cluster'].cat.categories
+    
+    # Matriks RS x cluster (jumlah ulasan dan total rating) dalam satu pass
+    counts, rating_sums = grouped_count_sum(
+        filtered['location'].cat.codes.to_numpy(),
+        filtered['cluster'].cat.codes.to_numpy(),
+        len(locations),
+        len(clusters),
+        weights=filtered['rating'].to_numpy(dtype=np.float64)
+    )
+    hospital_mask = counts.sum(axis=1) > 0
+    cluster_mask = counts.sum(axis=0) > 0
+    counts = counts[hospital_mask][:, cluster_mask]
+    rating_sums = rating_sums[hospital_mask][:, cluster_mask]
+    
+    count_matrix = pd.DataFrame(
+        counts,
+        index=pd.Index(locations[hospital_mask], name='location'),
+        columns=pd.Index(clusters[cluster_mask], name='cluster')
+    )
+    location_cluster_counts = count_matrix.stack()
+    location_cluster_counts = location_cluster_counts[location_cluster_counts > 0]
+    cluster_summary = location_cluster_counts.reset_index(name='Jumlah Ulasan')
+    
+    # Statistik insight per RS langsung dari matriks
+    total_reviews = counts.sum(axis=1)
+    hospital_insights = pd.DataFrame({
+        'total_reviews': total_reviews,
+        'avg_rating': rating_sums.sum(axis=1) / total_reviews,
+        'num_clusters': (counts > 0).sum(axis=1)
+    }, index=count_matrix.index)
+    
+    hospital_cluster_stats = hospital_insights[['num_clusters', 'avg_rating']].round(2)
+    hospital_cluster_stats.columns = ['Jumlah Cluster', 'Rating Rata-rata']
+    
+    return {
+        'cluster_counts': pd.Series(counts.sum(axis=0), index=count_matrix.columns),
+        'location_cluster_counts': location_cluster_counts,
+        'cluster_summary': cluster_summary,
+        'hospital_insights': hospital_insights,
+        'hospital_cluster_stats': hospital_cluster_stats,
+    }
+
+# Fungsi untuk mengambil warna sebanyak jumlah cluster
+def cluster_colorway(n):
+    """Melengkapi CLUSTER_COLORS dengan palet kualitatif agar tiap cluster punya warna sendiri"""
+    extra = [c for c in qualitative.Pastel + qualitative.Light24 if c not in CLUSTER_COLORS]
+    return (CLUSTER_COLORS + extra)[:n]
+
 # Fungsi untuk membuat visualisasi clustering
+@st.cache_data
+def create_cluster_pie(cluster_counts_named):
+    """Membuat pie chart distribusi cluster"""
+    fig = go.Figure(go.Pie(
+        values=cluster_counts_named.values,
+        labels=cluster_counts_named.index,
+        textposition='inside',
+        textinfo='percent+label'
+    ))
+    fig.update_layout(
+        piecolorway=['#00b894', '#fdcb6e', '#e17055', '#74b9ff', '#a29bfe', '#fd79a8'],
+        **PLOTLY_LAYOUT
+    )
+    return fig
+
+@st.cache_data
 def create_cluster_distribution(df):
     """Membuat chart distribusi cluster per RS"""
-    cluster_counts = df.groupby(['location', 'cluster']).size().reset_index(name='count')
-    
-    fig = px.bar(
-        cluster_counts,
-        x='location',
-        y='count',
-        color='cluster',
-        labels={'location': 'Rumah Sakit', 'count': 'Jumlah Ulasan', 'cluster': 'Cluster'},
-        color_discrete_sequence=['#ff6b6b', '#4ecdc4', '#45b7d1', '#96ceb4', '#ffeaa7', '#dda0dd']
-    )
+    cluster_counts = df.groupby(['location', 'cluster'], observed=True).size().unstack(fill_value=0)
+    locations = cluster_counts.index.astype(str)
+    counts = cluster_counts.to_numpy(dtype=np.int32)
+    
+    fig = go.Figure([
+        go.Bar(x=locations, y=counts[:, j], name=str(cluster))
+        for j, cluster in enumerate(cluster_counts.columns)
+    ])
     fig.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='#2c3e50')
+        barmode='relative',
+        xaxis_title="Rumah Sakit",
+        yaxis_title="Jumlah Ulasan",
+        legend_title_text="Cluster",
+        colorway=cluster_colorway(len(cluster_counts.columns)),
+        **PLOTLY_LAYOUT
     )
     return fig
 
+@st.cache_data
 def create_cluster_sentiment_heatmap(df):
     """Membuat heatmap cluster vs sentimen"""
-    cluster_sentiment = pd.crosstab(df['cluster'], df['predicted_sentiment'])
-    
-    fig = px.imshow(
-        cluster_sentiment.values,
-        x=cluster_sentiment.columns,
-        y=cluster_sentiment.index,
-        title="Heatmap: Cluster vs Sentimen",
-        labels={'x': 'Sentimen', 'y': 'Cluster', 'color': 'Jumlah'},
-        color_continuous_scale='Sunset'
-    )
+    cluster_sentiment = df.groupby(['cluster', 'predicted_sentiment'], observed=True).size().unstack(fill_value=0)
+    
+    fig = go.Figure(go.Heatmap(
+        z=np.ascontiguousarray(cluster_sentiment.to_numpy(dtype=np.int32)),
+        x=cluster_sentiment.columns.astype(str),
+        y=cluster_sentiment.index.astype(str),
+        colorscale='Sunset',
+        colorbar=dict(title='Jumlah')
+    ))
     fig.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='#2c3e50')
+        title="Heatmap: Cluster vs Sentimen",
+        xaxis_title="Sentimen",
+        yaxis_title="Cluster",
+        yaxis_autorange='reversed',
+        **PLOTLY_LAYOUT
     )
     return fig
 
+@st.cache_data
 def create_cluster_rating_correlation(df):
     """Membuat box plot korelasi cluster dan rating"""
-    fig = px.box(
-        df,
-        x='cluster',
-        y='rating',
+    groups = list(df.groupby('cluster', observed=True)['rating'])
+    colors = cluster_colorway(len(groups))
+    
+    fig = go.Figure([
+        go.Box(
+            y=ratings.to_numpy(),
+            name=str(cluster),
+            boxpoints=False,
+            marker_color=colors[i]
+        )
+        for i, (cluster, ratings) in enumerate(groups)
+    ])
+    fig.update_layout(
         title="Korelasi Rating dan Cluster",
-        labels={'cluster': 'Cluster', 'rating': 'Rating'},
-        color='cluster',
-        color_discrete_sequence=['#ff6b6b', '#4ecdc4', '#45b7d1', '#96ceb4', '#ffeaa7', '#dda0dd']
+        xaxis_title="Cluster",
+        yaxis_title="Rating",
+        **PLOTLY_LAYOUT
     )
+    return fig
+
+# Fungsi untuk membuat visualisasi Home dan sentimen
+@st.cache_data
+def create_rating_distribution(rating_dist):
+    """Membuat bar chart distribusi rating"""
+    fig = go.Figure(go.Bar(
+        x=rating_dist.index,
+        y=rating_dist.values,
+        marker=dict(color=rating_dist.values, colorscale='Sunset', showscale=True)
+    ))
     fig.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='#2c3e50')
+        xaxis_title="Rating",
+        yaxis_title="Jumlah Ulasan",
+        showlegend=False,
+        **PLOTLY_LAYOUT
     )
     return fig
 
-# Load data
-df = load_data()
+@st.cache_data
+def create_hospital_pie(hospital_counts):
+    """Membuat pie chart jumlah ulasan per RS"""
+    fig = go.Figure(go.Pie(
+        values=hospital_counts.values,
+        labels=hospital_counts.index.astype(str),
+        textposition='inside',
+        textinfo='percent+label'
+    ))
+    fig.update_layout(
+        piecolorway=CLUSTER_COLORS,
+        **PLOTLY_LAYOUT
+    )
+    return fig
 
-# Sidebar untuk navigasi
-st.sidebar.markdown("""
-<div style="text-align: center; padding: 1rem; background: linear-gradient(135deg, #ff6b6b 0%, #ee5a24 100%); border-radius: 10px; margin-bottom: 1rem;">
-    <h2 style="color: white; margin: 0;">🏥 Analisis Rumah Sakit</h2>
-</div>
-""", unsafe_allow_html=True)
+@st.cache_data
+def create_hospital_bar(hospital_counts):
+    """Membuat bar chart horizontal jumlah ulasan per RS"""
+    fig = go.Figure(go.Bar(
+        x=hospital_counts.values,
+        y=hospital_counts.index.astype(str),
+        orientation='h',
+        marker=dict(color=hospital_counts.values, colorscale='Turbo', showscale=True)
+    ))
+    fig.update_layout(
+        xaxis_title="Jumlah Ulasan",
+        yaxis_title="Rumah Sakit",
+        **PLOTLY_LAYOUT
+    )
+    return fig
 
-menu = st.sidebar.selectbox(
-    "📋 Pilih Menu",
-    ["🏠 Home", "🎯 Clustering", "😊 Analisis Sentimen"]
-)
+@st.cache_data
+def create_sentiment_distribution(sentiment_counts):
+    """Membuat bar chart distribusi sentimen"""
+    fig = go.Figure(go.Bar(
+        x=sentiment_counts.index.astype(str),
+        y=sentiment_counts.values,
+        marker_color=[SENTIMENT_COLORS.get(s) for s in sentiment_counts.index]
+    ))
+    fig.update_layout(
+        xaxis_title="Sentimen",
+        yaxis_title="Jumlah Data",
+        showlegend=False,
+        **PLOTLY_LAYOUT
+    )
+    return fig
 
-# Menu Home
-if menu == "🏠 Home":
+@st.cache_data
+def create_sentiment_hospital_chart(sentiment_hospital):
+    """Membuat stacked bar chart sentimen per RS"""
+    locations = sentiment_hospital.index.astype(str)
+    counts = sentiment_hospital.to_numpy(dtype=np.int32)
+    
+    fig = go.Figure([
+        go.Bar(
+            x=locations,
+            y=counts[:, j],
+            name=str(sentiment),
+            marker_color=SENTIMENT_COLORS.get(sentiment)
+        )
+        for j, sentiment in enumerate(sentiment_hospital.columns)
+    ])
+    fig.update_layout(
+        barmode='relative',
+        legend_title_text="Sentimen",
+        xaxis_title="Rumah Sakit",
+        yaxis_title="Jumlah Data",
+        **PLOTLY_LAYOUT
+    )
+    return fig
+
+# Fungsi untuk menampilkan tiap menu
+def render_home(df, agg):
+    """Menampilkan halaman Home"""
     st.markdown('<h1 class="main-header">🏥 Dashboard Analisis Rumah Sakit</h1>', unsafe_allow_html=True)
     
     # Overview metrics
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.markdown(f"""
-        <div class="metric-card" style="background: linear-gradient(135deg, #74b9ff 0%, #0984e3 100%);">
-            <h3>Total Ulasan</h3>
-            <h2>{len(df):,}</h2>
-        </div>
-        """, unsafe_allow_html=True)
+    hospital_counts = agg['hospital_counts']
+    total_hospitals = total_locations = len(hospital_counts)
     
-    with col2:
-        total_hospitals = df['location'].nunique()
-        st.markdown(f"""
-        <div class="metric-card" style="background: linear-gradient(135deg, #00b894 0%, #00a085 100%);">
-            <h3>Rumah Sakit</h3>
-            <h2>{total_hospitals}</h2>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col3:
-        total_locations = df['location'].nunique()
-        st.markdown(f"""
-        <div class="metric-card" style="background: linear-gradient(135deg, #fdcb6e 0%, #e17055 100%);">
-            <h3>Lokasi</h3>
-            <h2>{total_locations}</h2>
-        </div>
-        """, unsafe_allow_html=True)
+    cards = [
+        metric_card("linear-gradient(135deg, #74b9ff 0%, #0984e3 100%)", "Total Ulasan", f"{len(df):,}"),
+        metric_card("linear-gradient(135deg, #00b894 0%, #00a085 100%)", "Rumah Sakit", total_hospitals),
+        metric_card("linear-gradient(135deg, #fdcb6e 0%, #e17055 100%)", "Lokasi", total_locations)
+    ]
+    st.markdown(f'<div class="metric-row">{"".join(cards)}</div>', unsafe_allow_html=True)
     
     st.markdown("<br>", unsafe_allow_html=True)
     
@@ -216,118 +408,73 @@ if menu == "🏠 Home":
     
     with col1:
         st.subheader("🏥 Rating Rumah Sakit")
-        hospital_stats = df.groupby('location').agg({
-            'rating': 'mean',
-            'review': 'count'
-        }).round(2)
+        hospital_stats = agg['hospital_stats']
         
-        for hospital in hospital_stats.index:
-            avg_rating = hospital_stats.loc[hospital, 'rating']
-            review_count = hospital_stats.loc[hospital, 'review']
-            stars = "⭐" * int(avg_rating)
-            
-            st.markdown(f"""
+        # Semua kartu dikirim dalam satu elemen markdown
+        hospital_cards = []
+        for hospital, avg_rating, review_count in hospital_stats.itertuples():
+            stars = STARS[min(5, int(avg_rating))]
+            hospital_cards.append(f"""
             <div class="hospital-card">
                 {hospital} - {avg_rating}/5 {stars}<br>
                 <small>{review_count} ulasan</small>
-            </div>
-            """, unsafe_allow_html=True)
+            </div>""")
+        st.markdown("".join(hospital_cards), unsafe_allow_html=True)
     
     with col2:
         st.subheader("📊 Distribusi Rating")
-        rating_dist = df['rating'].value_counts().sort_index()
-        
-        fig = px.bar(
-            x=rating_dist.index,
-            y=rating_dist.values,
-            labels={'x': 'Rating', 'y': 'Count'},
-            color=rating_dist.values,
-            color_continuous_scale='Sunset'
-        )
-        fig.update_layout(
-            xaxis_title="Rating",
-            yaxis_title="Jumlah Ulasan",
-            showlegend=False,
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='#2c3e50')
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        fig = create_rating_distribution(agg['rating_dist'])
+        st.plotly_chart(fig, use_container_width=True, key='rating_dist_chart')
     
     # Detailed Charts
     st.markdown('<h3 class="main-header">Ulasan per Rumah Sakit</h3>', unsafe_allow_html=True)
     col1, col2 = st.columns(2)
     
     with col1:
-        hospital_counts = df['location'].value_counts()
-        
-        fig = px.pie(
-            values=hospital_counts.values,
-            names=hospital_counts.index,
-            color_discrete_sequence=['#ff6b6b', '#4ecdc4', '#45b7d1', '#96ceb4', '#ffeaa7', '#dda0dd', '#ff9ff3', '#54a0ff']
-        )
-        fig.update_traces(textposition='inside', textinfo='percent+label')
-        fig.update_layout(
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='#2c3e50')
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        fig = create_hospital_pie(hospital_counts)
+        st.plotly_chart(fig, use_container_width=True, key='hospital_pie_chart')
     
     with col2:
-        location_counts = df['location'].value_counts()
-        
-        fig = px.bar(
-            x=location_counts.values,
-            y=location_counts.index,
-            orientation='h',
-            color=location_counts.values,
-            color_continuous_scale='Turbo'
-        )
-        fig.update_layout(
-            xaxis_title="Jumlah Ulasan",
-            yaxis_title="Rumah Sakit",
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='#2c3e50')
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        fig = create_hospital_bar(hospital_counts)
+        st.plotly_chart(fig, use_container_width=True, key='hospital_bar_chart')
 
-# Menu Clustering
-elif menu == "🎯 Clustering":
+def render_clustering(df, agg):
+    """Menampilkan halaman Clustering"""
     st.markdown('<h1 class="main-header">🎯 Clustering </h1>', unsafe_allow_html=True)
     
     st.sidebar.header("🔍 Filter Clustering")    
     selected_hospitals_cluster = st.sidebar.multiselect(
         "Pilih Rumah Sakit:",
-        options=df['location'].unique(),
-        default=df['location'].unique()
+        options=agg['hospitals'],
+        default=agg['hospitals']
     )
     
+    render_clustering_content(df, agg, selected_hospitals_cluster)
+
+# Widget di halaman ini hanya menjalankan ulang fragment, bukan seluruh script.
+# Filter sidebar tetap di luar fragment karena fragment tidak boleh menulis ke sidebar.
+@st.fragment
+def render_clustering_content(df, agg, selected_hospitals_cluster):
+    """Menampilkan isi halaman Clustering untuk RS yang dipilih"""
     # Filter data untuk clustering
-    filtered_df_cluster = df[df['location'].isin(selected_hospitals_cluster)]
+    # Posisi diurutkan agar hasil (dan cache key) tidak bergantung urutan pilihan
+    location_idx = agg['location_idx']
+    filtered_pos = [location_idx[h] for h in selected_hospitals_cluster if h in location_idx]
+    if filtered_pos:
+        filtered_df_cluster = df.take(np.sort(np.concatenate(filtered_pos)))
+    else:
+        filtered_df_cluster = df.iloc[:0]
+    cluster_agg = build_cluster_aggregates(df, tuple(sorted(selected_hospitals_cluster)))
     
     # Cluster Overview Metrics
-    col1, col2 = st.columns(2)
-    
-    cluster_counts = filtered_df_cluster['cluster'].value_counts().sort_index()
+    cluster_counts = cluster_agg['cluster_counts']
     total_clusters = len(cluster_counts)
     
-    with col1:
-        st.markdown(f"""
-        <div class="metric-card" style="background: linear-gradient(135deg, #a29bfe 0%, #6c5ce7 100%);">
-            <h3>Total Review</h3>
-            <h2>{len(filtered_df_cluster):,}</h2>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown(f"""
-        <div class="metric-card" style="background: linear-gradient(135deg, #fd79a8 0%, #e84393 100%);">
-            <h3>Total Cluster</h3>
-            <h2>{total_clusters}</h2>
-        </div>
-        """, unsafe_allow_html=True)
+    cards = [
+        metric_card("linear-gradient(135deg, #a29bfe 0%, #6c5ce7 100%)", "Total Review", f"{len(filtered_df_cluster):,}"),
+        metric_card("linear-gradient(135deg, #fd79a8 0%, #e84393 100%)", "Total Cluster", total_clusters)
+    ]
+    st.markdown(f'<div class="metric-row">{"".join(cards)}</div>', unsafe_allow_html=True)
     
     # Clustering Visualizations
     st.header("📈 Visualisasi Clustering")
@@ -337,83 +484,46 @@ elif menu == "🎯 Clustering":
     with col1:
         st.subheader("📊 Hasil Distribusi Cluster Keseluruhan")
         
-        cluster_names = {0: 'Cluster 0', 1: 'Cluster 1', 2: 'Cluster 2'}
-        
-        fig = px.pie(
-            values=cluster_counts.values,
-            names=[cluster_names.get(i, f'Cluster {i}') for i in cluster_counts.index],
-            color_discrete_sequence=['#00b894', '#fdcb6e', '#e17055', '#74b9ff', '#a29bfe', '#fd79a8']
-        )
-        fig.update_traces(textposition='inside', textinfo='percent+label')
-        fig.update_layout(
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='#2c3e50')
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        cluster_counts_named = cluster_counts.rename(index=agg['cluster_names'])
+        fig = create_cluster_pie(cluster_counts_named)
+        st.plotly_chart(fig, use_container_width=True, key='cluster_pie_chart')
     
     with col2:
         st.subheader("🏥 Distribusi Cluster per Rumah Sakit")
         
         if len(filtered_df_cluster) > 0:
-            fig = create_cluster_distribution(filtered_df_cluster)
-            st.plotly_chart(fig, use_container_width=True)
+            fig = create_cluster_distribution(filtered_df_cluster[['location', 'cluster']])
+            st.plotly_chart(fig, use_container_width=True, key='cluster_distribution_chart')
     
     # Detailed Cluster Analysis Table
     st.header("📋 Detail Cluster per Rumah Sakit")
-
-    if 'predicted_sentiment' in filtered_df_cluster.columns:
-        cluster_summary = filtered_df_cluster.groupby(['location', 'cluster']).agg({
-            'predicted_sentiment': ['count']
-        }).round(2)
-        cluster_summary.columns = ['Jumlah Ulasan']
-        cluster_summary = cluster_summary.reset_index()
-        st.dataframe(cluster_summary, use_container_width=True)
-    else:
-        cluster_summary = filtered_df_cluster.groupby(['location', 'cluster']).agg({
-            'rating': ['count']
-        }).round(2)
-        cluster_summary.columns = ['Jumlah Ulasan']
-        cluster_summary = cluster_summary.reset_index()
-        st.dataframe(cluster_summary, use_container_width=True)
+    
+    # Detail yang panjang disembunyikan sampai dibuka pengguna
+    with st.expander("Tampilkan tabel detail cluster", expanded=False):
+        st.dataframe(cluster_agg['cluster_summary'], use_container_width=True)
     
     # Detailed Analysis and Insights
     st.header("🔍 Analisis dan Insight Clustering")
     
-    # Generate insights per hospital
-    st.markdown("### 🏥 **Analisis Clustering per Rumah Sakit:**")
-    
-    for hospital in sorted(filtered_df_cluster['location'].unique()):
-        hospital_data = filtered_df_cluster[filtered_df_cluster['location'] == hospital]
-        
-        # Statistik clustering
-        total_reviews = len(hospital_data)
-        avg_rating = hospital_data['rating'].mean()
-        cluster_counts_hospital = hospital_data['cluster'].value_counts().sort_index()
-        dominant_cluster = hospital_data['cluster'].mode().iloc[0] if len(hospital_data) > 0 else 'N/A'
-        num_clusters = hospital_data['cluster'].nunique()
+    with st.expander("Tampilkan analisis per rumah sakit", expanded=False):
+        # Generate insights per hospital
+        st.markdown("### 🏥 **Analisis Clustering per Rumah Sakit:**")
         
-        # Rating per cluster
-        rating_per_cluster = hospital_data.groupby('cluster')['rating'].mean().round(2)
-        
-        st.markdown(f"""
-        **{hospital}:**
-        - 📊 **Total Ulasan**: {total_reviews} ulasan
-        - ⭐ **Rating Rata-rata**: {avg_rating:.2f}/5.0
-        - 🔄 **Jumlah Cluster**: {num_clusters} cluster
-        - 📈 **Distribusi Cluster**: {dict(cluster_counts_hospital)}
-        """)
+        location_cluster_counts = cluster_agg['location_cluster_counts']
+        hospital_blocks = [
+            f"**{hospital}:**\n"
+            f"- 📊 **Total Ulasan**: {total_reviews} ulasan\n"
+            f"- ⭐ **Rating Rata-rata**: {avg_rating:.2f}/5.0\n"
+            f"- 🔄 **Jumlah Cluster**: {num_clusters} cluster\n"
+            f"- 📈 **Distribusi Cluster**: {dict(location_cluster_counts.loc[hospital])}"
+            for hospital, total_reviews, avg_rating, num_clusters in cluster_agg['hospital_insights'].itertuples()
+        ]
+        st.markdown("\n\n---\n\n".join(hospital_blocks))
+        st.markdown("---")
         
-        # Ringkasan Analisis Per Cluster
+        # Ringkasan Analisis Per Cluster (tidak bergantung pada rumah sakit, cukup sekali)
         st.subheader("Hasil Analisis Tiap Cluster")
-        hospital_cluster_stats = filtered_df_cluster.groupby('location').agg({
-            'cluster': 'nunique',
-            'rating': 'mean'
-        }).round(2)
-        hospital_cluster_stats.columns = ['Jumlah Cluster', 'Rating Rata-rata']
-        st.dataframe(hospital_cluster_stats, use_container_width=True)
-        
-        st.markdown("---")
+        st.dataframe(cluster_agg['hospital_cluster_stats'], use_container_width=True)
     
     st.markdown('</div>', unsafe_allow_html=True)
     
@@ -422,11 +532,21 @@ elif menu == "🎯 Clustering":
     
     selected_cluster = st.selectbox(
         "Pilih cluster untuk analisis detail:",
-        options=sorted(filtered_df_cluster['cluster'].unique()),
+        options=list(cluster_counts.index),
         format_func=lambda x: f"Cluster {x}"
     )
     
-    cluster_data = filtered_df_cluster[filtered_df_cluster['cluster'] == selected_cluster]
+    # Gabungkan posisi baris cluster terpilih dari setiap RS yang difilter
+    location_cluster_idx = agg['location_cluster_idx']
+    cluster_pos = [
+        location_cluster_idx[(hospital, selected_cluster)]
+        for hospital in selected_hospitals_cluster
+        if (hospital, selected_cluster) in location_cluster_idx
+    ]
+    if cluster_pos:
+        cluster_data = df.take(np.sort(np.concatenate(cluster_pos)))
+    else:
+        cluster_data = filtered_df_cluster.iloc[:0]
     
     col1, col2 = st.columns(2)
     
@@ -436,47 +556,49 @@ elif menu == "🎯 Clustering":
         st.write(f"- Rating range: {cluster_data['rating'].min():.1f} - {cluster_data['rating'].max():.1f}")
         if 'predicted_sentiment' in cluster_data.columns:
             sentiment_dist = cluster_data['predicted_sentiment'].value_counts()
-            for sentiment, count in sentiment_dist.items():
-                st.write(f"- {sentiment}: {count} ({count/len(cluster_data)*100:.1f}%)")
+            sentiment_stats = (
+                sentiment_dist[sentiment_dist > 0]
+                .to_frame('count')
+                .assign(pct=lambda d: d['count'] * 100 / d['count'].sum())
+            )
+            for sentiment, count, pct in sentiment_stats.itertuples():
+                st.write(f"- {sentiment}: {count} ({pct:.1f}%)")
         
         # Hospital distribution in cluster
         hospital_dist = cluster_data['location'].value_counts()
+        hospital_dist = hospital_dist[hospital_dist > 0]
         st.write("**Distribusi per Rumah Sakit:**")
         for hospital, count in hospital_dist.items():
             st.write(f"- {hospital}: {count} ulasan")
     
     with col2:
         st.markdown("**Sample Reviews:**")
-        sample_reviews = cluster_data['review'].sample(min(3, len(cluster_data)))
-        for i, review in enumerate(sample_reviews, 1):
-            st.write(f"{i}. {review}")
+        # Sampling hanya dijalankan saat diminta, bukan di setiap rerun
+        if st.button("🎲 Tampilkan contoh ulasan", key='cluster_sample_button'):
+            sample_reviews = np.random.default_rng().choice(
+                cluster_data['review'].to_numpy(),
+                size=min(3, len(cluster_data)),
+                replace=False
+            )
+            for i, review in enumerate(sample_reviews, 1):
+                st.write(f"{i}. {review}")
 
-# Menu Sentiment Analysis
-elif menu == "😊 Analisis Sentimen":
+@st.fragment
+def render_sentiment(df, agg):
+    """Menampilkan halaman Analisis Sentimen"""
     st.markdown('<h1 class="main-header">😊 Analisis Sentimen</h1>', unsafe_allow_html=True)
   
     # Sentiment Overview
-    sentiment_counts = df['predicted_sentiment'].value_counts()
+    sentiment_counts = agg['sentiment_counts']
     
-    col1, col2 = st.columns(2)
+    positive_count = sentiment_counts.get('positif', 0)
+    negative_count = sentiment_counts.get('negatif', 0)
     
-    with col1:
-        positive_count = sentiment_counts.get('positif', 0)
-        st.markdown(f"""
-        <div class="metric-card" style="background: linear-gradient(135deg, #00b894 0%, #00a085 100%);">
-            <h3>😊 Positif</h3>
-            <h2>{positive_count}</h2>
-        </div>
-        """, unsafe_allow_html=True)
-
-    with col2:
-        negative_count = sentiment_counts.get('negatif', 0)
-        st.markdown(f"""
-        <div class="metric-card" style="background: linear-gradient(135deg, #e17055 0%, #d63031 100%);">
-            <h3>😞 Negatif</h3>
-            <h2>{negative_count}</h2>
-        </div>
-        """, unsafe_allow_html=True)
+    cards = [
+        metric_card("linear-gradient(135deg, #00b894 0%, #00a085 100%)", "😊 Positif", positive_count),
+        metric_card("linear-gradient(135deg, #e17055 0%, #d63031 100%)", "😞 Negatif", negative_count)
+    ]
+    st.markdown(f'<div class="metric-row">{"".join(cards)}</div>', unsafe_allow_html=True)
     
     # Sentiment Analysis Charts
     col1, col2 = st.columns(2)
@@ -484,64 +606,36 @@ elif menu == "😊 Analisis Sentimen":
     with col1:
         st.subheader("📊 Distribusi Sentimen")
         
-        fig = px.bar(
-            x=sentiment_counts.index,
-            y=sentiment_counts.values,
-            color=sentiment_counts.index,
-            color_discrete_map={
-                'positif': '#00b894',
-                'negatif': '#e17055'
-            }
-        )
-        fig.update_layout(
-            xaxis_title="Sentimen",
-            yaxis_title="Jumlah Data",
-            showlegend=False,
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='#2c3e50')
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        fig = create_sentiment_distribution(sentiment_counts)
+        st.plotly_chart(fig, use_container_width=True, key='sentiment_distribution_chart')
     
     with col2:
         st.subheader("🏥 Distribusi Sentimen per Rumah Sakit")
         
-        sentiment_hospital = pd.crosstab(df['location'], df['predicted_sentiment'])
-        
-        fig = px.bar(
-            sentiment_hospital,
-            color_discrete_map={
-                'positif': '#00b894',
-                'negatif': '#e17055'
-            }
-        )
-        fig.update_layout(
-            xaxis_title="Rumah Sakit",
-            yaxis_title="Jumlah Data",
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='#2c3e50')
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        fig = create_sentiment_hospital_chart(agg['sentiment_hospital'])
+        st.plotly_chart(fig, use_container_width=True, key='sentiment_hospital_chart')
     
     # Detailed Sentiment Analysis
     st.subheader("🔍 Detail Analisis Sentimen")
     
-    selected_hospital = st.selectbox("Pilih rumah sakit:", ['Semua'] + list(df['location'].unique()))
+    selected_hospital = st.selectbox("Pilih rumah sakit:", ['Semua'] + list(agg['hospitals']))
     
     if selected_hospital != 'Semua':
-        filtered_df = df[df['location'] == selected_hospital]
+        sentiment_stats = agg['sentiment_hospital'].loc[selected_hospital].sort_values(ascending=False)
     else:
-        filtered_df = df
+        sentiment_stats = agg['sentiment_counts']
     
     st.markdown("**Statistik Sentimen:**")
-    sentiment_stats = filtered_df['predicted_sentiment'].value_counts()
-    for sentiment, count in sentiment_stats.items():
-        percentage = count/len(filtered_df)*100
-        if sentiment == 'positif':
-            st.markdown(f'<p class="sentiment-positive">😊 {sentiment}: {count} ({percentage:.1f}%)</p>', unsafe_allow_html=True)
-        elif sentiment == 'negatif':
-            st.markdown(f'<p class="sentiment-negative">😞 {sentiment}: {count} ({percentage:.1f}%)</p>', unsafe_allow_html=True)
+    total_filtered = sentiment_stats.sum()
+    sentiment_stats = sentiment_stats[sentiment_stats > 0]
+    percentages = sentiment_stats.mul(100 / total_filtered)
+    
+    stats_html = []
+    for sentiment, count, percentage in zip(sentiment_stats.index, sentiment_stats.values, percentages.values):
+        if sentiment in SENTIMENT_STYLES:
+            css_class, emoji = SENTIMENT_STYLES[sentiment]
+            stats_html.append(f'<p class="{css_class}">{emoji} {sentiment}: {count} ({percentage:.1f}%)</p>')
+    st.markdown("".join(stats_html), unsafe_allow_html=True)
 
     # Sample Reviews by Sentiment
     st.subheader("📝 Contoh Ulasan Berdasarkan Sentimen")
@@ -551,14 +645,48 @@ elif menu == "😊 Analisis Sentimen":
         ['positif', 'negatif']
     )
     
-    sentiment_reviews = filtered_df[filtered_df['predicted_sentiment'] == selected_sentiment]
-    if len(sentiment_reviews) > 0:
-        sample_reviews = sentiment_reviews['review'].sample(min(5, len(sentiment_reviews)))
+    if selected_hospital != 'Semua':
+        review_idx = agg['location_sentiment_idx'].get((selected_hospital, selected_sentiment), [])
+    else:
+        review_idx = agg['sentiment_idx'].get(selected_sentiment, [])
+    
+    if len(review_idx) > 0:
+        # Ambil posisi baris secara acak tanpa menyalin seluruh subset
+        pick = np.random.default_rng().choice(review_idx, size=min(5, len(review_idx)), replace=False)
+        sample_reviews = df['review'].iloc[pick]
         for i, review in enumerate(sample_reviews, 1):
             st.write(f"{i}. {review}")
     else:
         st.info(f"Tidak ada review dengan sentiment {selected_sentiment} untuk filter yang dipilih.")
 
+# Load data
+df = load_data()
+agg = build_aggregates(df)
+
+# Sidebar untuk navigasi
+st.sidebar.markdown("""
+<div style="text-align: center; padding: 1rem; background: linear-gradient(135deg, #ff6b6b 0%, #ee5a24 100%); border-radius: 10px; margin-bottom: 1rem;">
+    <h2 style="color: white; margin: 0;">🏥 Analisis Rumah Sakit</h2>
+</div>
+""", unsafe_allow_html=True)
+
+menu = st.sidebar.selectbox(
+    "📋 Pilih Menu",
+    ["🏠 Home", "🎯 Clustering", "😊 Analisis Sentimen"]
+)
+
+# Menu Home
+if menu == "🏠 Home":
+    render_home(df, agg)
+
+# Menu Clustering
+elif menu == "🎯 Clustering":
+    render_clustering(df, agg)
+
+# Menu Sentiment Analysis
+elif menu == "😊 Analisis Sentimen":
+    render_sentiment(df, agg)
+
 # Footer
 st.markdown("---")
 st.markdown("""